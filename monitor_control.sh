@@ -39,6 +39,10 @@ case "$1" in
             echo "Website monitor daemon is not running."
         fi
         ;;
+    export)
+        echo "Exporting visits to CSV..."
+        python3 "$DAEMON_PATH" export
+        ;;
     uninstall)
         echo "Uninstalling website monitor daemon..."
         launchctl unload ~/Library/LaunchAgents/com.user.website.monitor.plist 2>/dev/null
@@ -48,7 +52,7 @@ case "$1" in
         echo "Uninstallation complete."
         ;;
     *)
-        echo "Usage: $0 {install|start|stop|restart|status|uninstall}"
+        echo "Usage: $0 {install|start|stop|restart|status|export|uninstall}"
         echo ""
         echo "Commands:"
         echo "  install   - Install daemon and dependencies"
@@ -56,6 +60,7 @@ case "$1" in
         echo "  stop      - Stop the monitoring daemon"
         echo "  restart   - Restart the monitoring daemon"
         echo "  status    - Check daemon status and recent logs"
+        echo "  export    - Write /tmp/website_visits_export.csv from the visits log"
         echo "  uninstall - Remove daemon and cleanup files"
         exit 1
         ;;
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the Website Monitor Daemon
+Run with: python3 -m unittest test_website_monitor_daemon
+"""
+
+import os
+import json
+import sqlite3
+import asyncio
+import tempfile
+import unittest
+
+import website_monitor_daemon as monitor_daemon
+
+class ExclusiveWriterTest(unittest.TestCase):
+    """Chromium keeps History open with locking_mode=EXCLUSIVE while the browser runs"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_path = os.path.join(self.tmp.name, 'History')
+        self.writer = sqlite3.connect(self.history_path, isolation_level=None)
+        self.writer.execute("PRAGMA locking_mode=EXCLUSIVE")
+        self.writer.execute("CREATE TABLE urls(id INTEGER PRIMARY KEY, url, title, visit_count, last_visit_time INTEGER)")
+
+        self.visits_file = os.path.join(self.tmp.name, 'visits.ndjson')
+        self.monitor = monitor_daemon.WebsiteMonitor(os.path.join(self.tmp.name, 'monitor.log'), self.visits_file)
+        browser = dict(monitor_daemon.BROWSERS[0], path=self.history_path)
+        self.monitor._collect_sources = lambda: [(browser, self.history_path)]
+
+    def tearDown(self):
+        self.monitor.shutdown()
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def visit(self, n):
+        """Record a visit through the exclusive writer and give the file a new mtime"""
+        self.writer.execute("INSERT INTO urls(url, title, visit_count, last_visit_time) VALUES (?, 'title', 1, ?)",
+                            (f'https://example.com/{n}', 13300000000000000 + n * 1000000))
+        os.utime(self.history_path, ns=(n * 10**9, n * 10**9))
+
+    def test_every_visit_is_logged_across_polls(self):
+        for n in range(4):
+            self.visit(n)
+            asyncio.run(self.monitor.poll_browsers())
+
+        with open(self.visits_file, encoding='utf-8') as f:
+            urls = [json.loads(line)['url'] for line in f]
+        self.assertEqual(urls, [f'https://example.com/{n}' for n in range(4)])
+
+if __name__ == "__main__":
+    unittest.main()
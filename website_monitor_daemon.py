@@ -10,271 +10,582 @@ import sqlite3
 import json
 import time
 import shutil
+import subprocess
+import tempfile
+import fcntl
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import csv
-from datetime import datetime
+import queue
+import asyncio
+from collections import Counter
+from operator import itemgetter
+from datetime import datetime, timedelta
 from pathlib import Path
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 import signal
 import daemon
 from daemon import pidfile
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+CSV_FIELDNAMES = ['timestamp', 'browser', 'url', 'title', 'visit_time', 'visit_count']
+NOLOCK_URI_PARAMS = 'mode=ro&nolock=1'
+READONLY_URI_PARAMS = (NOLOCK_URI_PARAMS, 'mode=ro')
+BACKUP_BUSY_CODES = (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+BACKUP_BUSY_RETRIES = 5
+FICLONE = 0x40049409  # linux/fs.h _IOW(0x94, 9, int)
+
+# History queries are kept as constants so the identical text hits each persistent
+# connection's statement cache and is only compiled once
+CHROME_SQL = """
+SELECT url, title, visit_count, last_visit_time
+FROM urls
+WHERE last_visit_time > ?
+ORDER BY last_visit_time DESC
+LIMIT 100
+"""
+
+SAFARI_SQL = """
+SELECT history_items.url, history_visits.title, NULL as visit_count, history_visits.visit_time
+FROM history_items
+JOIN history_visits ON history_items.id = history_visits.history_item
+WHERE history_visits.visit_time > ?
+ORDER BY history_visits.visit_time DESC
+LIMIT 100
+"""
+
+FIREFOX_SQL = """
+SELECT url, title, visit_count, last_visit_date
+FROM moz_places
+WHERE last_visit_date > ?
+ORDER BY last_visit_date DESC
+LIMIT 100
+"""
+
+# Every supported browser, described as data. `path` is the history DB, or for browsers
+# with multiple profiles the directory holding them, each with a `profile_db` inside.
+# Raw visit timestamps are `unit`s since `epoch`.
+BROWSERS = [
+    {
+        'name': 'Chrome',
+        'path': '~/Library/Application Support/Google/Chrome/Default/History',
+        'sql': CHROME_SQL,
+        'epoch': datetime(1601, 1, 1),
+        'unit': 'microseconds',
+    },
+    {
+        'name': 'Safari',
+        'path': '~/Library/Safari/History.db',
+        'sql': SAFARI_SQL,
+        'epoch': datetime(2001, 1, 1),
+        'unit': 'seconds',
+    },
+    {
+        'name': 'Firefox',
+        'path': '~/Library/Application Support/Firefox/Profiles/',
+        'profile_db': 'places.sqlite',
+        'sql': FIREFOX_SQL,
+        'epoch': datetime(1970, 1, 1),
+        'unit': 'microseconds',
+    },
+    {
+        'name': 'Edge',
+        'path': '~/Library/Application Support/Microsoft Edge/Default/History',
+        'sql': CHROME_SQL,  # Edge uses Chromium format
+        'epoch': datetime(1601, 1, 1),
+        'unit': 'microseconds',
+    },
+]
+HISTORY_DB_NAMES = {b.get('profile_db') or os.path.basename(b['path']) for b in BROWSERS}
+
+class HistoryChangeHandler(FileSystemEventHandler):
+    """Queue the history DB behind each modified history, journal or WAL file"""
+
+    def __init__(self, notify):
+        self.notify = notify
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved'):
+            return
+        path = getattr(event, 'dest_path', '') or event.src_path
+        for suffix in ('-journal', '-wal'):
+            if path.endswith(suffix):
+                path = path[:-len(suffix)]
+                break
+        if os.path.basename(path) in HISTORY_DB_NAMES:
+            self.notify(os.path.normpath(path))
 
 class WebsiteMonitor:
-    def __init__(self, log_file='/tmp/website_monitor.log', csv_file='/tmp/website_visits.csv'):
+    def __init__(self, log_file='/tmp/website_monitor.log', visits_file='/tmp/website_visits.ndjson', migrate_wal=False):
         self.log_file = log_file
-        self.csv_file = csv_file
+        self.visits_file = visits_file
+        self.migrate_wal = migrate_wal
         self.running = True
-        self.check_interval = 10  # seconds
-        self.seen_urls = set()
+        self.check_interval = 10  # seconds, back-off after an error
+        self.rescan_interval = 60  # seconds, longest gap between full rescans
+        self.debounce = 0.5  # seconds
+        self.profile_ttl = 60  # seconds
+        # Browser name -> (expiry, profile history DB paths)
+        self.profiles = {}
+        # History DB paths reported as changed by the file watcher; an asyncio.Queue
+        # created once the event loop is running
+        self.changes = None
+        self.observer = None
+        self.watch_handler = None
+        # Directories scheduled on the observer
+        self.watched = set()
+        # time.monotonic() of the last poll that covered every history DB
+        self.last_full_poll = 0.0
+        # Newest visit timestamp seen per history DB path, in the browser's native units
+        self.last_seen = {}
+        # (DB mtime, WAL mtime) per history DB path as of its last flushed poll
+        self.last_mtime = {}
+        self.pool = ThreadPoolExecutor(max_workers=6)
+        # Long-lived read-only connections to WAL history DBs keyed by path: (inode, connection)
+        self.conns = {}
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
+        # Setup logging; records are queued and written out by a background listener thread
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        file_handler = logging.FileHandler(log_file)
+        stream_handler = logging.StreamHandler()
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+        log_queue = queue.Queue(-1)
+        self.log_listener = QueueListener(log_queue, file_handler, stream_handler)
+        self.log_listener.start()
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+        self.logger.handlers = [QueueHandler(log_queue)]
+        self.logger.propagate = False
         
-        # Initialize CSV file with headers if it doesn't exist
-        self.init_csv_file()
-        
-        # Browser history paths
-        self.browser_paths = {
-            'Chrome': '~/Library/Application Support/Google/Chrome/Default/History',
-            'Firefox': '~/Library/Application Support/Firefox/Profiles/*/places.sqlite',
-            'Safari': '~/Library/Safari/History.db',
-            'Edge': '~/Library/Application Support/Microsoft Edge/Default/History'
-        }
-
-    def init_csv_file(self):
-        """Initialize CSV file with headers if it doesn't exist"""
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['timestamp', 'browser', 'url', 'title', 'visit_time', 'visit_count']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-
-    def log_to_csv(self, visit_data):
-        """Log visit data to CSV file - prepend new entries to top"""
+        # Visits are appended as one JSON object per line; the file stays open for the daemon's lifetime
+        self.visits_fp = open(visits_file, 'a', encoding='utf-8')
+
+    def _visit_record(self, visit_data, timestamp):
+        """Build the NDJSON line for a visit"""
+        return json.dumps({
+            'timestamp': timestamp,
+            'browser': visit_data['browser'],
+            'url': visit_data['url'],
+            'title': visit_data.get('title') or '',
+            'visit_time': visit_data.get('visit_time', ''),
+            'visit_count': visit_data.get('visit_count')
+        }, ensure_ascii=False) + '\n'
+
+    def log_visits(self, visits, timestamp=None):
+        """Append a batch of visits to the visits file in a single write and sync; True on success"""
+        if not visits:
+            return True
+        # Visits found in the same cycle share one recorded-at timestamp
+        timestamp = timestamp or datetime.now().isoformat()
         try:
-            # Clean title field to avoid CSV issues
-            title = visit_data.get('title', '').replace('"', '""').replace('\n', ' ').replace('\r', ' ') if visit_data.get('title') else ''
-            
-            new_row = {
-                'timestamp': datetime.now().isoformat(),
-                'browser': visit_data['browser'],
-                'url': visit_data['url'],
-                'title': title,
-                'visit_time': visit_data.get('visit_time', ''),
-                'visit_count': visit_data.get('visit_count', '')
-            }
-            
-            # Read existing data if file exists
-            existing_data = []
-            fieldnames = ['timestamp', 'browser', 'url', 'title', 'visit_time', 'visit_count']
-            
-            if os.path.exists(self.csv_file):
-                with open(self.csv_file, 'r', newline='', encoding='utf-8') as csvfile:
-                    reader = csv.DictReader(csvfile)
-                    existing_data = list(reader)
-            
-            # Write new row first, then existing data
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerow(new_row)  # New entry first
-                writer.writerows(existing_data)  # Then existing entries
-                
+            self.visits_fp.writelines(self._visit_record(visit, timestamp) for visit in visits)
+            self.visits_fp.flush()
+            # One durability barrier per batch; macOS has no fdatasync
+            getattr(os, 'fdatasync', os.fsync)(self.visits_fp.fileno())
+            return True
         except Exception as e:
-            self.logger.error(f"Error writing to CSV: {e}")
+            self.logger.error(f"Error writing visits: {e}")
+            return False
+
+    def migrate_to_wal(self):
+        """One-shot switch of rollback-journal history DBs to WAL so reads don't contend with the browser"""
+        for browser, path in self._collect_sources():
+            try:
+                conn = sqlite3.connect(Path(path).as_uri() + '?mode=rw', uri=True, timeout=0)
+                try:
+                    if conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+                        mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                        self.logger.info(f"{browser['name']} history at {path} journal mode: {mode}")
+                finally:
+                    conn.close()
+            except sqlite3.DatabaseError as e:
+                # Typically the browser is running and holds its lock; reads fall back as usual
+                self.logger.warning(f"Could not switch {browser['name']} history at {path} to WAL: {e}")
 
-    def get_chrome_history(self, history_path):
-        """Extract recent history from Chrome"""
+    def _connect_readonly(self, history_path, uri_params):
+        """Open a browser history DB in place, read-only"""
+        uri = Path(history_path).as_uri() + '?' + uri_params
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
         try:
-            temp_path = '/tmp/chrome_history_copy.db'
-            shutil.copy2(history_path, temp_path)
-            
-            conn = sqlite3.connect(temp_path)
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT url, title, visit_count, datetime(last_visit_time/1000000 + (strftime('%s', '1601-01-01')), 'unixepoch') as visit_time
-            FROM urls 
-            ORDER BY last_visit_time DESC 
-            LIMIT 100
-            """
-            
-            cursor.execute(query)
-            results = cursor.fetchall()
+            conn.execute("PRAGMA query_only=1")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-30000")
+            # Touch the schema so an unusable connection fails here rather than mid-query
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        except sqlite3.DatabaseError:
             conn.close()
-            os.remove(temp_path)
-            
-            return results
-        except Exception as e:
-            self.logger.error(f"Error reading Chrome history: {e}")
-            return []
+            raise
+        return conn
 
-    def get_safari_history(self, history_path):
-        """Extract recent history from Safari"""
+    def _get_connection(self, history_path):
+        """Return (connection, cached) for a history DB; uncached connections must be closed by the caller"""
+        inode = os.stat(history_path).st_ino
+        cached = self.conns.get(history_path)
+        if cached and cached[0] == inode:
+            return cached[1], True
+        self._close_connection(history_path)
+        
+        # nolock gets past Chromium's exclusive lock; WAL databases (Safari, Firefox) refuse it
+        # but can be read concurrently with the browser using a plain read-only connection
+        for uri_params in READONLY_URI_PARAMS:
+            try:
+                conn = self._connect_readonly(history_path, uri_params)
+            except sqlite3.DatabaseError as e:
+                error = e
+                continue
+            if uri_params != NOLOCK_URI_PARAMS:
+                # WAL readers revalidate their page cache through the wal-index, so they can be kept
+                self.conns[history_path] = (inode, conn)
+                return conn, True
+            # An exclusive-locking writer never bumps the change counter, so a kept nolock
+            # connection would serve stale pages forever; open a fresh one for every poll
+            return conn, False
+        raise error
+
+    def _close_connection(self, history_path):
+        """Close and forget the cached connection for a history DB"""
+        cached = self.conns.pop(history_path, None)
+        if cached:
+            cached[1].close()
+
+    def close_connections(self):
+        """Close every cached history DB connection"""
+        for history_path in list(self.conns):
+            self._close_connection(history_path)
+
+    def _clone_file(self, src, dst):
+        """Copy a file as a copy-on-write clone where the filesystem supports it"""
         try:
-            temp_path = '/tmp/safari_history_copy.db'
-            shutil.copy2(history_path, temp_path)
-            
-            conn = sqlite3.connect(temp_path)
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT history_items.url, history_visits.title, 
-                   datetime(history_visits.visit_time + 978307200, 'unixepoch') as visit_time
-            FROM history_items 
-            JOIN history_visits ON history_items.id = history_visits.history_item
-            ORDER BY history_visits.visit_time DESC 
-            LIMIT 100
-            """
-            
-            cursor.execute(query)
-            results = cursor.fetchall()
-            conn.close()
-            os.remove(temp_path)
-            
-            return results
-        except Exception as e:
-            self.logger.error(f"Error reading Safari history: {e}")
-            return []
+            if sys.platform == 'darwin':
+                # cp -c uses clonefile(2) on APFS
+                subprocess.run(['cp', '-c', src, dst], check=True, capture_output=True)
+                return
+            if sys.platform.startswith('linux'):
+                with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                    fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+                return
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        shutil.copy2(src, dst)
+
+    def _snapshot_query(self, history_path, query, params):
+        """Run a query against an in-memory snapshot taken with SQLite's online backup API"""
+        busy_steps = []
+        
+        def give_up_when_busy(status, remaining, total):
+            # backup() otherwise retries a locked source forever
+            if status in BACKUP_BUSY_CODES:
+                busy_steps.append(status)
+                if len(busy_steps) > BACKUP_BUSY_RETRIES:
+                    raise sqlite3.OperationalError("database is locked")
+        
+        src = sqlite3.connect(Path(history_path).as_uri() + '?mode=ro', uri=True, timeout=0)
+        dst = sqlite3.connect(':memory:')
+        try:
+            # Unlike a byte copy, backup honours the browser's locks and can't capture a torn write
+            src.backup(dst, progress=give_up_when_busy, sleep=0.1)
+            return dst.execute(query, params).fetchall()
+        finally:
+            src.close()
+            dst.close()
 
-    def get_firefox_history(self, profile_path):
-        """Extract recent history from Firefox"""
+    def _query_history(self, history_path, query, params=()):
+        """Run a history query directly against the DB, snapshotting it only if that fails"""
+        try:
+            conn, cached = self._get_connection(history_path)
+            try:
+                return conn.execute(query, params).fetchall()
+            finally:
+                if not cached:
+                    conn.close()
+        except sqlite3.DatabaseError as e:
+            self._close_connection(history_path)
+            self.logger.warning(f"Direct read of {history_path} failed ({e}), falling back to a snapshot")
+        
         try:
-            temp_path = '/tmp/firefox_history_copy.db'
-            shutil.copy2(profile_path, temp_path)
-            
+            return self._snapshot_query(history_path, query, params)
+        except sqlite3.DatabaseError as e:
+            # Chromium holds an exclusive lock while running, which the backup API respects
+            self.logger.warning(f"Backup of {history_path} failed ({e}), falling back to a copy")
+        
+        # Unique per call: pool workers may fall back concurrently, and Chrome/Edge (History)
+        # and every Firefox profile (places.sqlite) share basenames
+        fd, temp_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            self._clone_file(history_path, temp_path)
             conn = sqlite3.connect(temp_path)
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT url, title, visit_count, 
-                   datetime(last_visit_date/1000000, 'unixepoch') as visit_time
-            FROM moz_places 
-            WHERE last_visit_date IS NOT NULL
-            ORDER BY last_visit_date DESC 
-            LIMIT 100
-            """
-            
-            cursor.execute(query)
-            results = cursor.fetchall()
-            conn.close()
+            try:
+                conn.execute("PRAGMA query_only=1")
+                return conn.execute(query, params).fetchall()
+            finally:
+                conn.close()
+        finally:
             os.remove(temp_path)
-            
-            return results
+
+    def extract(self, browser, path, since=0):
+        """Extract history from one browser DB visited after `since` (browser-native timestamp); None on error"""
+        try:
+            return self._query_history(path, browser['sql'], (since,))
         except Exception as e:
-            self.logger.error(f"Error reading Firefox history: {e}")
-            return []
+            self.logger.error(f"Error reading {browser['name']} history: {e}")
+            return None
 
-    def monitor_browsers(self):
-        """Main monitoring loop"""
-        while self.running:
-            try:
-                new_visits = []
-                
-                # Check Chrome
-                chrome_path = os.path.expanduser(self.browser_paths['Chrome'])
-                if os.path.exists(chrome_path):
-                    history = self.get_chrome_history(chrome_path)
-                    for url, title, visit_count, visit_time in history:
-                        if url not in self.seen_urls:
-                            new_visits.append({
-                                'browser': 'Chrome',
-                                'url': url,
-                                'title': title,
-                                'visit_time': visit_time,
-                                'visit_count': visit_count
-                            })
-                            self.seen_urls.add(url)
-                
-                # Check Safari
-                safari_path = os.path.expanduser(self.browser_paths['Safari'])
-                if os.path.exists(safari_path):
-                    history = self.get_safari_history(safari_path)
-                    for url, title, visit_time in history:
-                        if url not in self.seen_urls:
-                            new_visits.append({
-                                'browser': 'Safari',
-                                'url': url,
-                                'title': title,
-                                'visit_time': visit_time
-                            })
-                            self.seen_urls.add(url)
-                
-                # Check Firefox profiles
-                firefox_base = os.path.expanduser('~/Library/Application Support/Firefox/Profiles/')
-                if os.path.exists(firefox_base):
-                    for profile_dir in os.listdir(firefox_base):
-                        places_path = os.path.join(firefox_base, profile_dir, 'places.sqlite')
-                        if os.path.exists(places_path):
-                            history = self.get_firefox_history(places_path)
-                            for url, title, visit_count, visit_time in history:
-                                if url not in self.seen_urls:
-                                    new_visits.append({
-                                        'browser': 'Firefox',
-                                        'url': url,
-                                        'title': title,
-                                        'visit_time': visit_time,
-                                        'visit_count': visit_count
-                                    })
-                                    self.seen_urls.add(url)
-                
-                # Check Edge
-                edge_path = os.path.expanduser(self.browser_paths['Edge'])
-                if os.path.exists(edge_path):
-                    history = self.get_chrome_history(edge_path)  # Edge uses Chromium format
-                    for url, title, visit_count, visit_time in history:
-                        if url not in self.seen_urls:
-                            new_visits.append({
-                                'browser': 'Edge',
-                                'url': url,
-                                'title': title,
-                                'visit_time': visit_time,
-                                'visit_count': visit_count
-                            })
-                            self.seen_urls.add(url)
-                
-                # Log new visits
-                for visit in new_visits:
-                    self.logger.info(f"NEW VISIT: {visit['browser']} - {visit['url']} - {visit['title']} - {visit['visit_time']}")
-                    self.log_to_csv(visit)
-                
-                time.sleep(self.check_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(self.check_interval)
-
-    def signal_handler(self, signum, frame):
+    def flush_visits(self, new_visits, timestamp=None):
+        """Log and record one polling cycle's worth of new visits; True once they are written"""
+        if not new_visits:
+            return True
+        
+        counts = Counter(visit['browser'] for visit in new_visits)
+        self.logger.info("Cycle: %d new visits (%s)", len(new_visits),
+                         ', '.join(f"{browser}={count}" for browser, count in counts.items()))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for visit in new_visits:
+                self.logger.debug("NEW VISIT: %s - %s - %s - %s",
+                                  visit['browser'], visit['url'], visit['title'], visit['visit_time'])
+        
+        return self.log_visits(new_visits, timestamp)
+
+    def _visit_time(self, browser, raw_time):
+        """Convert a browser's native visit timestamp to a UTC 'YYYY-MM-DD HH:MM:SS' string"""
+        visit_time = browser['epoch'] + timedelta(**{browser['unit']: raw_time})
+        return visit_time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _db_mtime(self, path):
+        """Modification times of a history DB and its WAL, which takes writes until checkpointed"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            return mtime, os.stat(path + '-wal').st_mtime_ns
+        except OSError:
+            return mtime, None
+
+    def _prune_state(self, active_paths):
+        """Drop cursors and connections for history DBs that no longer exist"""
+        for path in set(self.last_seen) - active_paths:
+            del self.last_seen[path]
+        for path in set(self.last_mtime) - active_paths:
+            del self.last_mtime[path]
+        for path in set(self.conns) - active_paths:
+            self._close_connection(path)
+
+    def _collect_sources(self):
+        """List (browser, path) for every history DB present on disk"""
+        sources = []
+        for browser in BROWSERS:
+            path = os.path.expanduser(browser['path'])
+            if 'profile_db' not in browser:
+                if os.path.exists(path):
+                    sources.append((browser, path))
+            else:
+                sources.extend((browser, profile_path) for profile_path in self._discover_profiles(browser))
+        return sources
+
+    def _discover_profiles(self, browser):
+        """History DB paths of a multi-profile browser, rescanned at most every profile_ttl seconds"""
+        cached = self.profiles.get(browser['name'])
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        
+        base = os.path.expanduser(browser['path'])
+        profile_paths = []
+        try:
+            with os.scandir(base) as entries:
+                for entry in entries:
+                    profile_path = os.path.join(entry.path, browser['profile_db'])
+                    if entry.is_dir() and os.path.exists(profile_path):
+                        profile_paths.append(profile_path)
+        except FileNotFoundError:
+            pass
+        self.profiles[browser['name']] = (time.monotonic() + self.profile_ttl, profile_paths)
+        return profile_paths
+
+    def start_watcher(self, loop):
+        """Watch the browser profile directories and queue history DBs as they change"""
+        # Observer callbacks run on watchdog's thread; hand paths over to the event loop
+        self.watch_handler = HistoryChangeHandler(lambda path: loop.call_soon_threadsafe(self.changes.put_nowait, path))
+        self.observer = Observer()
+        self._watch_new_dirs()
+        self.observer.start()
+
+    def _watch_new_dirs(self):
+        """Schedule watches for browser directories that exist now but aren't watched yet"""
+        for browser in BROWSERS:
+            path = os.path.expanduser(browser['path'])
+            # Profile directories are watched recursively, single DBs via their parent directory
+            watch_dir = path if 'profile_db' in browser else os.path.dirname(path)
+            if watch_dir not in self.watched and os.path.isdir(watch_dir):
+                self.observer.schedule(self.watch_handler, watch_dir, recursive='profile_db' in browser)
+                self.watched.add(watch_dir)
+
+    async def wait_for_changes(self):
+        """Wait until a history DB changes; return the changed paths, or None for a full rescan"""
+        # Periodic full rescan picks up newly installed browsers and profiles, even while
+        # a busy browser keeps the event queue from ever going quiet
+        rescan_due = self.last_full_poll + self.rescan_interval
+        try:
+            path = await asyncio.wait_for(self.changes.get(), timeout=max(rescan_due - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return None
+        if path is None:
+            return None  # Woken up for shutdown
+        
+        # Browsers write in bursts; let them settle and coalesce into one poll
+        changed = {path}
+        await asyncio.sleep(self.debounce)
+        while not self.changes.empty():
+            path = self.changes.get_nowait()
+            if path is not None:
+                changed.add(path)
+        if time.monotonic() >= rescan_due:
+            return None
+        return changed
+
+    async def poll_browsers(self, changed=None):
+        """Query history DBs for new visits, limited to `changed` paths when given"""
+        loop = asyncio.get_running_loop()
+        timestamp = datetime.now().isoformat()
+        
+        if changed is None:
+            self.last_full_poll = time.monotonic()
+            self.profiles.clear()
+            if self.observer:
+                self._watch_new_dirs()
+        
+        sources = self._collect_sources()
+        if changed is not None and not changed <= {os.path.normpath(path) for _, path in sources}:
+            # A history DB outside the cached profile lists changed, e.g. a newly created profile
+            self.profiles.clear()
+            sources = self._collect_sources()
+        self._prune_state({path for _, path in sources})
+        if changed is not None:
+            sources = [source for source in sources if os.path.normpath(source[1]) in changed]
+        
+        pending = []
+        extracts = []
+        for browser, path in sources:
+            # A stat is far cheaper than a query; skip DBs the browser hasn't written since last time
+            mtime = self._db_mtime(path)
+            if mtime is not None and mtime == self.last_mtime.get(path):
+                continue
+            pending.append((browser, path, mtime))
+            # SQLite reads are blocking; run them on the pool, where they release the GIL and overlap
+            extracts.append(loop.run_in_executor(
+                self.pool, self.extract, browser, path, self.last_seen.get(path, 0)))
+        
+        new_visits = []
+        cursors = {}
+        mtimes = {}
+        for (browser, path, mtime), rows in zip(pending, await asyncio.gather(*extracts)):
+            if rows is None:
+                continue  # Read failed; leave its cursor and mtime so the next poll retries it
+            mtimes[path] = mtime
+            since = self.last_seen.get(path, 0)
+            for url, title, visit_count, last_visit_time in rows:
+                try:
+                    visit_time = self._visit_time(browser, last_visit_time)
+                except (OverflowError, ValueError, TypeError) as e:
+                    # Skipped without advancing the cursor, so one corrupt row can't hide later visits
+                    self.logger.warning(f"Skipping {browser['name']} visit to {url} with bad timestamp {last_visit_time!r}: {e}")
+                    continue
+                new_visits.append({
+                    'browser': browser['name'],
+                    'url': url,
+                    'title': title,
+                    'visit_time': visit_time,
+                    'visit_count': visit_count
+                })
+                since = max(since, last_visit_time)
+            cursors[path] = since
+        
+        # Only move past these visits once they are safely on disk
+        if self.flush_visits(new_visits, timestamp):
+            self.last_seen.update(cursors)
+            self.last_mtime.update(mtimes)
+
+    async def main(self):
+        """Event loop: poll on file changes (or periodically) until asked to stop"""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.signal_handler, signum)
+        self.changes = asyncio.Queue()
+        
+        self.logger.info("Website Monitor Daemon starting...")
+        if self.migrate_wal:
+            self.migrate_to_wal()
+        self.start_watcher(loop)
+        
+        try:
+            changed = None
+            while self.running:
+                try:
+                    await self.poll_browsers(changed)
+                    if self.running:
+                        changed = await self.wait_for_changes()
+                    
+                except Exception as e:
+                    self.logger.error(f"Error in monitoring loop: {e}")
+                    changed = None
+                    await asyncio.sleep(self.check_interval)
+        finally:
+            self.shutdown()
+
+    def signal_handler(self, signum):
         """Handle shutdown signals"""
         self.logger.info("Received shutdown signal, stopping daemon...")
         self.running = False
-        sys.exit(0)
+        self.changes.put_nowait(None)
+
+    def shutdown(self):
+        """Release the watcher, worker threads, connections and files"""
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        self.pool.shutdown()
+        self.close_connections()
+        self.visits_fp.close()
+        self.log_listener.stop()
 
     def run(self):
         """Run the daemon"""
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
-        
-        self.logger.info("Website Monitor Daemon starting...")
-        self.monitor_browsers()
+        asyncio.run(self.main())
+
+def export_csv(visits_file, csv_file):
+    """Convert the NDJSON visits file to a CSV with the newest visits first"""
+    with open(visits_file, 'r', encoding='utf-8') as f:
+        visits = [json.loads(line) for line in f if line.strip()]
+    # Keep one visit per CSV line for line-oriented tools (tail, grep)
+    for visit in visits:
+        visit['title'] = (visit.get('title') or '').replace('\n', ' ').replace('\r', ' ')
+    
+    # Fixed column order: one C-level itemgetter call per row, fed straight to csv.writer
+    # without DictWriter's wrapper and extra-key check
+    row_of = itemgetter(*CSV_FIELDNAMES)
+    rows = [row_of(visit) for visit in reversed(visits)]
+    with open(csv_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CSV_FIELDNAMES)
+        writer.writerows(rows)
+    return len(visits)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 website_monitor_daemon.py [start|stop|restart]")
+    if len(sys.argv) < 2 or any(arg != '--migrate-wal' for arg in sys.argv[2:]):
+        print("Usage: python3 website_monitor_daemon.py [start|stop|restart|export] [--migrate-wal]")
         sys.exit(1)
     
     action = sys.argv[1]
+    # Opt-in: switch rollback-journal browser DBs to WAL once at startup
+    migrate_wal = '--migrate-wal' in sys.argv[2:]
     pid_file = '/tmp/website_monitor.pid'
     log_file = '/tmp/website_monitor.log'
-    csv_file = '/tmp/website_visits.csv'
+    visits_file = '/tmp/website_visits.ndjson'
+    # Not website_visits.csv: that file holds the history written by pre-NDJSON versions
+    csv_file = '/tmp/website_visits_export.csv'
     
     if action == 'start':
         try:
@@ -283,7 +594,7 @@ def main():
                 stdout=open('/tmp/website_monitor_stdout.log', 'w+'),
                 stderr=open('/tmp/website_monitor_stderr.log', 'w+'),
             ):
-                monitor = WebsiteMonitor(log_file, csv_file)
+                monitor = WebsiteMonitor(log_file, visits_file, migrate_wal=migrate_wal)
                 monitor.run()
         except Exception as e:
             print(f"Error starting daemon: {e}")
@@ -315,14 +626,22 @@ def main():
                 stdout=open('/tmp/website_monitor_stdout.log', 'w+'),
                 stderr=open('/tmp/website_monitor_stderr.log', 'w+'),
             ):
-                monitor = WebsiteMonitor(log_file, csv_file)
+                monitor = WebsiteMonitor(log_file, visits_file, migrate_wal=migrate_wal)
                 monitor.run()
         except Exception as e:
             print(f"Error restarting daemon: {e}")
             sys.exit(1)
     
+    elif action == 'export':
+        try:
+            count = export_csv(visits_file, csv_file)
+            print(f"Exported {count} visits to {csv_file}")
+        except Exception as e:
+            print(f"Error exporting visits: {e}")
+            sys.exit(1)
+    
     else:
-        print("Invalid action. Use: start, stop, or restart")
+        print("Invalid action. Use: start, stop, restart, or export")
         sys.exit(1)
 
 if __name__ == "__main__":